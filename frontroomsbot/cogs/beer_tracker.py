@@ -2,34 +2,397 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime, timedelta
-from typing import Optional, Literal
+from typing import Any, Awaitable, Callable, Optional, Literal
+import time
+import base64
 import uuid
+from traceback import print_exc
+from contextlib import suppress
 from zoneinfo import ZoneInfo
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+from bson import ObjectId
 
 from bot import BackroomsBot
 
 prague_tz = ZoneInfo("Europe/Prague")
+_UTC = ZoneInfo("UTC")
+_EPOCH = datetime(1970, 1, 1, tzinfo=_UTC)
+_DRINK_EMOJI = {"beer": "🍺", "cider": "🍎"}
+_TOTAL_FIELDS = {"beer": "total_beers", "cider": "total_ciders", "all": "total_drinks"}
 
 
 def ts_to_prague_time(ts: datetime) -> datetime:
     """Convert a UTC timestamp to Prague timezone."""
     if ts.tzinfo is None:
-        ts = ts.replace(tzinfo=ZoneInfo("UTC"))
+        ts = ts.replace(tzinfo=_UTC)
     return ts.astimezone(prague_tz)
 
 
+def day_key(ts: datetime) -> str:
+    """The Prague calendar day of a timestamp, used to key daily buckets."""
+    return ts_to_prague_time(ts).strftime("%Y-%m-%d")
+
+
 def get_drink_emoji(drink_type: Literal["beer", "cider"]) -> str:
+    return _DRINK_EMOJI.get(drink_type, "🍺")
+
+
+def parse_beer_id(beer_id: str) -> ObjectId | str | None:
+    """
+    Parse a beer id given by a user, or None if it is malformed.
+
+    Beers are keyed by ObjectId, older entries still use UUID4 strings.
+    """
+    if ObjectId.is_valid(beer_id):
+        return ObjectId(beer_id)
+    try:
+        uuid.UUID(beer_id)
+    except ValueError:
+        return None
+    return beer_id
+
+
+def encode_page_token(beer: dict) -> str:
+    """Encode the position of a beer in the my_beers listing as a page token."""
+    ts = beer["timestamp"]
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=_UTC)
+    millis = (ts - _EPOCH) // timedelta(milliseconds=1)
+    return base64.urlsafe_b64encode(f"{millis}:{beer['_id']}".encode()).decode()
+
+
+def decode_page_token(token: str) -> tuple[datetime, ObjectId | str] | None:
+    """Decode a page token into a (timestamp, id) pair, or None if it is invalid."""
+    try:
+        millis, beer_id = base64.urlsafe_b64decode(token).decode().split(":", 1)
+        ts = _EPOCH + timedelta(milliseconds=int(millis))
+    except (ValueError, OverflowError):
+        return None
+    if (beer_key := parse_beer_id(beer_id)) is None:
+        return None
+    return ts, beer_key
+
+
+def drink_type_filter(drink_type: Literal["beer", "cider", "all"]) -> dict:
+    """Build a beer_events filter matching entries of the given drink type."""
+    if drink_type == "all":
+        return {}
+    return {"type": drink_type}
+
+
+def period_start_day(period: Literal["day", "week", "month", "year"]) -> str:
+    """
+    The first daily bucket included in the given period.
+
+    Periods cover whole Prague days, counting today, e.g. a week is today and the
+    six days before it.
+    """
+    now = datetime.now(prague_tz)
+    if period == "day":
+        start = now
+    elif period == "week":
+        start = now - timedelta(days=6)
+    elif period == "month":
+        start = now - timedelta(days=29)
+    elif period == "year":
+        start = now - timedelta(days=364)
+    return start.strftime("%Y-%m-%d")
+
+
+def bucket_count(drink_type: Literal["beer", "cider", "all"]) -> dict | str:
+    """Aggregation expression counting drinks of a type in a daily bucket."""
     if drink_type == "beer":
-        return "🍺"
+        return "$beers"
     elif drink_type == "cider":
-        return "🍎"
+        return "$ciders"
     else:
-        return "🍺"
+        return {"$add": ["$beers", "$ciders"]}
+
+
+def drink_count(
+    beers: int, ciders: int, drink_type: Literal["beer", "cider", "all"]
+) -> int:
+    """Pick the count matching a drink type out of a beers/ciders pair."""
+    if drink_type == "beer":
+        return beers
+    elif drink_type == "cider":
+        return ciders
+    else:
+        return beers + ciders
+
+
+def period_totals_pipeline(
+    period: Literal["day", "week", "month", "year"],
+    drink_type: Literal["beer", "cider", "all"],
+    user_id: Optional[int] = None,
+) -> list[dict]:
+    """
+    Aggregation summing the daily buckets in a period into one document per user,
+    with the per type totals and the count for the given drink type.
+    """
+    match: dict[str, Any] = {"day": {"$gte": period_start_day(period)}}
+    if user_id is not None:
+        match["user_id"] = user_id
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": "$user_id",
+                "count": {"$sum": bucket_count(drink_type)},
+                "beers": {"$sum": "$beers"},
+                "ciders": {"$sum": "$ciders"},
+            }
+        },
+    ]
 
 
 class BeerTrackerCog(commands.Cog):
+    # seconds the stats and leaderboard results are reused for
+    CACHE_TTL = 30
+
     def __init__(self, bot: BackroomsBot) -> None:
         self.bot = bot
+        self._cache: dict[tuple, tuple[float, Any]] = {}
+
+    async def cog_load(self) -> None:
+        # a failing migration shouldn't stop the bot and the other cogs loading
+        try:
+            await self._prepare_db()
+        except Exception:
+            print_exc()
+
+    async def _prepare_db(self) -> None:
+        """Create the indexes and migrate the beer collections."""
+        db = self.bot.db
+        # beer_tracker holds the per user totals, every beer is in beer_events
+        try:
+            await db.beer_tracker.create_index("user_id", unique=True)
+        except OperationFailure as e:
+            # older concurrent upserts may have left duplicate user documents
+            print(f"Could not create the unique user_id index on beer_tracker: {e}")
+        for field in _TOTAL_FIELDS.values():
+            await db.beer_tracker.create_index([(field, -1)])
+        await db.beer_tracker.update_many(
+            {"total_drinks": {"$exists": False}},
+            [
+                {
+                    "$set": {
+                        "total_drinks": {
+                            "$add": [
+                                {"$ifNull": ["$total_beers", 0]},
+                                {"$ifNull": ["$total_ciders", 0]},
+                            ]
+                        }
+                    }
+                }
+            ],
+        )
+        await db.beer_events.create_index(
+            [("user_id", 1), ("timestamp", -1), ("_id", -1)]
+        )
+        await self._migrate_beer_events()
+
+        # per user per day counts, so period queries don't scan every beer
+        await db.beer_daily_counts.create_index(
+            [("user_id", 1), ("day", 1)], unique=True
+        )
+        await db.beer_daily_counts.create_index([("day", -1)])
+        if not await db.beer_daily_counts.estimated_document_count():
+            await self._rebuild_daily_counts()
+
+    async def _migrate_beer_events(self) -> None:
+        """Move beers still embedded in beer_tracker documents to beer_events."""
+        db = self.bot.db
+        # the indexes on the embedded beers aren't used anymore
+        for index in ("beers.id_1", "beers.timestamp_-1"):
+            with suppress(OperationFailure):
+                await db.beer_tracker.drop_index(index)
+
+        legacy = {"beers": {"$exists": True}}
+        if not await db.beer_tracker.count_documents(legacy, limit=1):
+            return
+
+        pipeline = [
+            {"$match": legacy},
+            {"$unwind": "$beers"},
+            {
+                "$project": {
+                    "_id": "$beers.id",
+                    "user_id": 1,
+                    # entries logged before drink types existed have no type
+                    "type": {"$ifNull": ["$beers.type", "beer"]},
+                    "timestamp": "$beers.timestamp",
+                }
+            },
+            {"$merge": {"into": "beer_events", "whenMatched": "keepExisting"}},
+        ]
+        await db.beer_tracker.aggregate(pipeline).to_list(None)
+        await db.beer_tracker.update_many(legacy, {"$unset": {"beers": ""}})
+
+    async def _rebuild_daily_counts(self) -> None:
+        """Backfill beer_daily_counts from the beers logged so far."""
+        is_cider = {"$eq": ["$type", "cider"]}
+        pipeline = [
+            {
+                "$group": {
+                    "_id": {
+                        "user_id": "$user_id",
+                        "day": {
+                            "$dateToString": {
+                                "format": "%Y-%m-%d",
+                                "date": "$timestamp",
+                                "timezone": "Europe/Prague",
+                            }
+                        },
+                    },
+                    "beers": {"$sum": {"$cond": [is_cider, 0, 1]}},
+                    "ciders": {"$sum": {"$cond": [is_cider, 1, 0]}},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "user_id": "$_id.user_id",
+                    "day": "$_id.day",
+                    "beers": 1,
+                    "ciders": 1,
+                }
+            },
+            {
+                "$merge": {
+                    "into": "beer_daily_counts",
+                    "on": ["user_id", "day"],
+                    "whenMatched": "replace",
+                }
+            },
+        ]
+        await self.bot.db.beer_events.aggregate(pipeline).to_list(None)
+
+    def _clear_caches(self) -> None:
+        """Drop cached stats and leaderboards after a beer is logged or deleted."""
+        self._cache.clear()
+
+    async def _cached(self, key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached result for key, or await fetch and cache its result.
+
+        Results are kept for CACHE_TTL seconds, or until the next write.
+        """
+        now = time.monotonic()
+        if (hit := self._cache.get(key)) and now - hit[0] < self.CACHE_TTL:
+            return hit[1]
+        value = await fetch()
+        self._cache[key] = (now, value)
+        return value
+
+    async def _inc_daily_count(
+        self, user_id: int, ts: datetime, drink_type: str, amount: int
+    ) -> None:
+        if drink_type == "cider":
+            field, other_field = "ciders", "beers"
+        else:
+            field, other_field = "beers", "ciders"
+        await self.bot.db.beer_daily_counts.update_one(
+            {"user_id": user_id, "day": day_key(ts)},
+            {"$inc": {field: amount}, "$setOnInsert": {other_field: 0}},
+            upsert=True,
+        )
+
+    async def _counts(
+        self,
+        user_id: int,
+        period: Optional[Literal["day", "week", "month", "year"]],
+    ) -> Optional[tuple[int, int]]:
+        """
+        A user's (beers, ciders) counts in a period, or None if they have never
+        logged any drink.
+        """
+        return await self._cached(
+            ("counts", user_id, period), lambda: self._fetch_counts(user_id, period)
+        )
+
+    async def _fetch_counts(
+        self,
+        user_id: int,
+        period: Optional[Literal["day", "week", "month", "year"]],
+    ) -> Optional[tuple[int, int]]:
+        db = self.bot.db
+        user_data = await db.beer_tracker.find_one(
+            {"user_id": user_id}, {"total_beers": 1, "total_ciders": 1}
+        )
+        total_beers = user_data.get("total_beers", 0) if user_data else 0
+        total_ciders = user_data.get("total_ciders", 0) if user_data else 0
+
+        if not (total_beers or total_ciders):
+            return None
+        if not period:
+            return total_beers, total_ciders
+
+        cursor = db.beer_daily_counts.aggregate(
+            period_totals_pipeline(period, "all", user_id=user_id)
+        )
+        rows = await cursor.to_list(1)
+        return (rows[0]["beers"], rows[0]["ciders"]) if rows else (0, 0)
+
+    async def _leaderboard(
+        self,
+        period: Optional[Literal["day", "week", "month", "year"]],
+        limit: int,
+        drink_type: Literal["beer", "cider", "all"],
+    ) -> list[tuple[int, int, int, int]]:
+        """The top drinkers as (count, user_id, beers, ciders) tuples."""
+        return await self._cached(
+            ("leaderboard", period, drink_type, limit),
+            lambda: self._fetch_leaderboard(period, limit, drink_type),
+        )
+
+    async def _fetch_leaderboard(
+        self,
+        period: Optional[Literal["day", "week", "month", "year"]],
+        limit: int,
+        drink_type: Literal["beer", "cider", "all"],
+    ) -> list[tuple[int, int, int, int]]:
+        db = self.bot.db
+
+        if period:
+            # count, sort and limit the daily buckets server side
+            cursor = db.beer_daily_counts.aggregate(
+                [
+                    *period_totals_pipeline(period, drink_type),
+                    {"$match": {"count": {"$gt": 0}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": limit},
+                ]
+            )
+            return [
+                (row["count"], row["_id"], row["beers"], row["ciders"])
+                async for row in cursor
+            ]
+
+        # the totals are precomputed and indexed, so just sort on the stored field
+        field = _TOTAL_FIELDS[drink_type]
+        cursor = (
+            db.beer_tracker.find(
+                {field: {"$gt": 0}},
+                {"total_beers": 1, "total_ciders": 1, "user_id": 1},
+            )
+            .sort(field, -1)
+            .limit(limit)
+        )
+        leaderboard = []
+        async for user_data in cursor:
+            total_beers = user_data.get("total_beers", 0)
+            total_ciders = user_data.get("total_ciders", 0)
+            leaderboard.append(
+                (
+                    drink_count(total_beers, total_ciders, drink_type),
+                    user_data["user_id"],
+                    total_beers,
+                    total_ciders,
+                )
+            )
+        return leaderboard
 
     @app_commands.command(
         name="beer", description="Log a beer for yourself or someone else! 🍺"
@@ -46,188 +409,188 @@ class BeerTrackerCog(commands.Cog):
     ):
         db = self.bot.db
         target_user = user or interaction.user
-        current_time = datetime.now()
-
-        # Get or create user's beer data
-        user_data = await db.beer_tracker.find_one({"user_id": target_user.id}) or {
-            "user_id": target_user.id,
-            "username": target_user.name,
-            "beers": [],
-            "total_beers": 0,
-            "total_ciders": 0,
-        }
-
-        # Add new beer entry with timestamp and UUID
-        beer_id = str(uuid.uuid4())
-        user_data["beers"].append(
-            {"id": beer_id, "timestamp": current_time, "type": drink_type}
-        )
-
-        # update total beers count and username if necessary
-        if drink_type == "beer":
-            user_data["total_beers"] = user_data.get("total_beers", 0) + 1
-        elif drink_type == "cider":
-            user_data["total_ciders"] = user_data.get("total_ciders", 0) + 1
+        current_time = datetime.now(_UTC)
 
-        user_data["username"] = target_user.name
+        if drink_type == "cider":
+            counter_field, other_field = "total_ciders", "total_beers"
+        else:
+            counter_field, other_field = "total_beers", "total_ciders"
 
-        # Save to DB
-        await db.beer_tracker.replace_one(
-            {"user_id": target_user.id}, user_data, upsert=True
+        # Add new beer entry with timestamp, then update the totals and
+        # username in a single atomic write
+        await db.beer_events.insert_one(
+            {
+                "_id": ObjectId(),
+                "user_id": target_user.id,
+                "type": drink_type,
+                "timestamp": current_time,
+                "emoji": get_drink_emoji(drink_type),
+            }
         )
+        user_data = await db.beer_tracker.find_one_and_update(
+            {"user_id": target_user.id},
+            {
+                "$inc": {counter_field: 1, "total_drinks": 1},
+                "$set": {"username": target_user.name},
+                "$setOnInsert": {other_field: 0},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection={counter_field: 1},
+        )
+        count = user_data[counter_field]
+        await self._inc_daily_count(target_user.id, current_time, drink_type, 1)
+        self._clear_caches()
 
-        if drink_type == "beer":
-            await interaction.response.send_message(
-                f"{target_user.mention} has now drunk **{user_data['total_beers']}** beers total! {get_drink_emoji(drink_type)}"
-            )
-        elif drink_type == "cider":
+        if drink_type == "cider":
             await interaction.response.send_message(
-                f"{target_user.mention} has now drunk **{user_data['total_ciders']}** "
+                f"{target_user.mention} has now drunk **{count}** "
                 f"ciders total! {get_drink_emoji(drink_type)} (Fuj ble 🤒)"
             )
         else:
             await interaction.response.send_message(
-                f"{target_user.mention} has now drunk **{user_data['total_beers']}** beers total! {get_drink_emoji(drink_type)}"
+                f"{target_user.mention} has now drunk **{count}** beers total! {get_drink_emoji(drink_type)}"
             )
 
     @app_commands.command(
         name="my_beers",
-        description="List your beer logs with UUIDs (used for deletion) (can be cider too)",
+        description="List your beer logs with IDs (used for deletion) (can be cider too)",
     )
     @app_commands.describe(
         limit="Number of beers to show (1-50)",
-        page="Page number to view",
+        after="Page token from the footer of the previous page",
         drink_type="What type of drink? (Defaults to beer, can be cider 🍎 )",
     )
     async def my_beers(
         self,
         interaction: discord.Interaction,
         limit: app_commands.Range[int, 1, 50] = 10,
-        page: app_commands.Range[int, 1] = 1,
+        after: Optional[str] = None,
         drink_type: Optional[Literal["beer", "cider", "all"]] = "all",
     ):
-        db = self.bot.db
-        user_data = await db.beer_tracker.find_one({"user_id": interaction.user.id})
-        if not user_data or not user_data["beers"]:
-            await interaction.response.send_message(
-                "You haven't logged any beers yet! 🚱", ephemeral=True
-            )
-            return
+        # defer response to avoid timeout
+        await interaction.response.defer(ephemeral=True)
 
-        if drink_type == "all":
-            all_beers = user_data["beers"]
-        elif drink_type == "beer":
-            all_beers = [
-                b for b in user_data["beers"] if b.get("type", "beer") == "beer"
+        db = self.bot.db
+        query = {"user_id": interaction.user.id, **drink_type_filter(drink_type)}
+        if after is not None:
+            if (position := decode_page_token(after)) is None:
+                await interaction.followup.send("❌ Invalid page token!", ephemeral=True)
+                return
+            # continue right after the last beer of the previous page
+            last_ts, last_id = position
+            query["$or"] = [
+                {"timestamp": {"$lt": last_ts}},
+                {"timestamp": last_ts, "_id": {"$lt": last_id}},
             ]
-        elif drink_type == "cider":
-            all_beers = [b for b in user_data["beers"] if b.get("type") == "cider"]
 
-        # sort by newest
-        all_beers = sorted(all_beers, key=lambda x: x["timestamp"], reverse=True)
-        total_beers = len(all_beers)
-        total_pages = (total_beers + limit - 1) // limit
+        # the totals are already stored, so no need to count the entries
+        counts = await self._counts(interaction.user.id, None)
+        total_beers = drink_count(*counts, drink_type) if counts else 0
 
-        # validate page number
-        if page > total_pages:
-            await interaction.response.send_message(
-                f"Page {page} doesn't exist! There are only {total_pages} page(s) available.",
-                ephemeral=True,
+        if not total_beers:
+            await interaction.followup.send(
+                "You haven't logged any beers yet! 🚱", ephemeral=True
             )
             return
 
-        # pagination logic
-        start_idx = (page - 1) * limit
-        end_idx = start_idx + limit
-        paginated_beers = all_beers[start_idx:end_idx]
+        # fetch one extra beer to find out whether there is a next page
+        paginated_beers = (
+            await db.beer_events.find(query)
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(limit + 1)
+            .to_list(limit + 1)
+        )
+        has_next = len(paginated_beers) > limit
+        paginated_beers = paginated_beers[:limit]
+
+        if not paginated_beers:
+            await interaction.followup.send("No more beers to show! 🚱", ephemeral=True)
+            return
 
         # build the embed
         embed = discord.Embed(
-            title=f"Your Beer Logs (Page {page}/{total_pages})",
+            title="Your Beer Logs",
             description=f"Total beers: {total_beers}",
             color=discord.Color.blue(),
         )
 
         for beer in paginated_beers:
             beer_time = ts_to_prague_time(beer["timestamp"]).strftime("%Y-%m-%d %H:%M")
-            drink_type = beer.get("type", "beer")
-            emoji = get_drink_emoji(drink_type)
+            # entries migrated from beer_tracker don't have the emoji stored
+            emoji = beer.get("emoji") or get_drink_emoji(beer["type"])
             embed.add_field(
-                name=f"{emoji} {beer_time}", value=f"`{beer['id']}`", inline=False
+                name=f"{emoji} {beer_time}", value=f"`{beer['_id']}`", inline=False
             )
 
         # add footer for pagination
-        footer_parts = []
-        if page > 1:
-            footer_parts.append(f"Previous: /my_beers page={page-1}")
-        if page < total_pages:
-            footer_parts.append(f"Next: /my_beers page={page+1}")
+        if has_next:
+            # the token is only a position, so repeat the filters used
+            next_args = [f"after={encode_page_token(paginated_beers[-1])}"]
+            if limit != 10:
+                next_args.append(f"limit={limit}")
+            if drink_type != "all":
+                next_args.append(f"drink_type={drink_type}")
+            embed.set_footer(text=f"Next: /my_beers {' '.join(next_args)}")
 
-        if footer_parts:
-            embed.set_footer(text=" | ".join(footer_parts))
-
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
     @app_commands.command(
-        name="beer_delete", description="Delete a beer entry by its UUID"
+        name="beer_delete", description="Delete a beer entry by its ID"
     )
     @app_commands.describe(
-        beer_uuid="The UUID of the beer to delete",
+        beer_id="The ID of the beer to delete",
     )
-    async def beer_delete(self, interaction: discord.Interaction, beer_uuid: str):
+    async def beer_delete(self, interaction: discord.Interaction, beer_id: str):
         db = self.bot.db
 
-        # verify UUID format
-        try:
-            uuid.UUID(beer_uuid)
-        except ValueError:
+        # verify ID format
+        beer_key = parse_beer_id(beer_id)
+        if beer_key is None:
             await interaction.response.send_message(
-                "❌ Invalid beer UUID format!", ephemeral=True
+                "❌ Invalid beer ID format!", ephemeral=True
             )
             return
 
         # find which user owns this beer
-        user_data = await db.beer_tracker.find_one({"beers.id": beer_uuid})
+        deleted_beer = await db.beer_events.find_one({"_id": beer_key})
 
-        if not user_data:
+        if not deleted_beer:
             await interaction.response.send_message(
-                "❌ No beer found with that UUID!", ephemeral=True
+                "❌ No beer found with that ID!", ephemeral=True
             )
             return
 
         # permission check
-        if user_data["user_id"] != interaction.user.id:
+        if deleted_beer["user_id"] != interaction.user.id:
             await interaction.response.send_message(
                 "❌ You can only delete your own beers!", ephemeral=True
             )
             return
 
-        # remove the beer entry
-        updated_beers = [b for b in user_data["beers"] if b["id"] != beer_uuid]
-
-        try:
-            deleted_beer = next(b for b in user_data["beers"] if b["id"] == beer_uuid)
-        except StopIteration:
+        # only update the totals if we were the ones to remove the entry
+        result = await db.beer_events.delete_one({"_id": beer_key})
+        if not result.deleted_count:
             await interaction.response.send_message(
-                "❌ No beer found with that UUID!", ephemeral=True
+                "❌ No beer found with that ID!", ephemeral=True
             )
             return
 
-        # recalculate totals
-        total_beers = len([b for b in updated_beers if b.get("type", "beer") == "beer"])
-        total_ciders = len([b for b in updated_beers if b.get("type") == "cider"])
-
-        # update database
+        if deleted_beer["type"] == "cider":
+            counter_field = "total_ciders"
+        else:
+            counter_field = "total_beers"
         await db.beer_tracker.update_one(
-            {"user_id": user_data["user_id"]},
-            {
-                "$set": {
-                    "beers": updated_beers,
-                    "total_beers": total_beers,
-                    "total_ciders": total_ciders,
-                }
-            },
+            {"user_id": deleted_beer["user_id"]},
+            {"$inc": {counter_field: -1, "total_drinks": -1}},
+        )
+        await self._inc_daily_count(
+            deleted_beer["user_id"],
+            deleted_beer["timestamp"],
+            deleted_beer["type"],
+            -1,
         )
+        self._clear_caches()
 
         # build confirmation message
         beer_time = ts_to_prague_time(deleted_beer["timestamp"]).strftime(
@@ -237,7 +600,7 @@ class BeerTrackerCog(commands.Cog):
         response = [
             f"✅ Successfully deleted beer entry for {interaction.user.mention}!",
             f"**Timestamp:** {beer_time}",
-            f"**UUID:** `{beer_uuid}`",
+            f"**ID:** `{beer_id}`",
         ]
 
         await interaction.response.send_message("\n".join(response), ephemeral=True)
@@ -256,51 +619,23 @@ class BeerTrackerCog(commands.Cog):
         drink_type: Optional[Literal["beer", "cider", "all"]] = "all",
     ):
         target_user = user or interaction.user
-        db = self.bot.db
 
-        user_data = await db.beer_tracker.find_one({"user_id": target_user.id})
+        # defer response to avoid timeout
+        await interaction.response.defer()
 
-        if not user_data or not user_data["beers"]:
-            await interaction.response.send_message(
+        counts = await self._counts(target_user.id, period)
+
+        if counts is None:
+            await interaction.followup.send(
                 f"{target_user.mention} hasn't drunk any beers yet! 🚱"
             )
             return
 
-        # Filter beers by time period if specified
-        beers = user_data["beers"]
-
-        if drink_type == "beer":
-            beers = [b for b in beers if b.get("type", "beer") == "beer"]
-        elif drink_type == "cider":
-            beers = [b for b in beers if b.get("type") == "cider"]
+        count = drink_count(*counts, drink_type)
 
-        if period:
-            now = datetime.now(prague_tz)
-            if period == "day":
-                cutoff = now - timedelta(days=1)
-            elif period == "week":
-                cutoff = now - timedelta(weeks=1)
-            elif period == "month":
-                cutoff = now - timedelta(days=30)
-            elif period == "year":
-                cutoff = now - timedelta(days=365)
-
-            filtered_beers = [
-                b for b in beers if ts_to_prague_time(b["timestamp"]) >= cutoff
-            ]
-            count = len(filtered_beers)
-        else:
-            if drink_type == "all":
-                count = user_data.get("total_beers", 0) + user_data.get(
-                    "total_ciders", 0
-                )
-            elif drink_type == "beer":
-                count = user_data.get("total_beers", 0)
-            elif drink_type == "cider":
-                count = user_data.get("total_ciders", 0)
-            period = "all time"
+        period = period or "all time"
 
-        await interaction.response.send_message(
+        await interaction.followup.send(
             f"**{target_user.name}** has drunk **{count}** beers ({period})! 🍻"
         )
 
@@ -319,73 +654,18 @@ class BeerTrackerCog(commands.Cog):
         limit: Optional[app_commands.Range[int, 1, 30]] = 10,
         drink_type: Optional[Literal["beer", "cider", "all"]] = "all",
     ):
-        db = self.bot.db
-        all_users = await db.beer_tracker.find().to_list(None)
+        # defer response to avoid timeout
+        await interaction.response.defer()
 
-        if not all_users:
-            await interaction.response.send_message("No beers have been logged yet! 🚱")
-            return
-
-        # Calculate beer counts for each user (filtering by period if needed)
-        leaderboard = []
-        for user_data in all_users:
-            if not user_data.get("beers"):
-                continue
-
-            if drink_type == "beer":
-                beers = [
-                    b for b in user_data["beers"] if b.get("type", "beer") == "beer"
-                ]
-            elif drink_type == "cider":
-                beers = [b for b in user_data["beers"] if b.get("type") == "cider"]
-            else:  # drink_type == "all"
-                beers = user_data["beers"]
+        leaderboard = await self._leaderboard(period, limit, drink_type)
 
+        if not leaderboard:
             if period:
-                now = datetime.now(prague_tz)
-                if period == "day":
-                    # cutoff is the start of today
-                    cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                elif period == "week":
-                    cutoff = now - timedelta(weeks=1)
-                elif period == "month":
-                    cutoff = now - timedelta(days=30)
-                elif period == "year":
-                    cutoff = now - timedelta(days=365)
-
-                filtered_beers = [
-                    b for b in beers if ts_to_prague_time(b["timestamp"]) >= cutoff
-                ]
-                total_count = len(filtered_beers)
-            else:
-                if drink_type == "all":
-                    total_count = user_data.get("total_beers", 0) + user_data.get(
-                        "total_ciders", 0
-                    )
-                elif drink_type == "beer":
-                    total_count = user_data.get("total_beers", 0)
-                elif drink_type == "cider":
-                    total_count = user_data.get("total_ciders", 0)
-
-            if total_count > 0:
-                leaderboard.append(
-                    (
-                        user_data["username"],
-                        total_count,
-                        user_data["user_id"],
-                        user_data["total_beers"],
-                        user_data["total_ciders"],
-                    )
+                await interaction.followup.send(
+                    f"No beers logged in the last {period}! 🚱"
                 )
-
-        # Sort by beer count (descending)
-        leaderboard.sort(key=lambda x: x[1], reverse=True)
-        leaderboard = leaderboard[:limit]
-
-        if not leaderboard:
-            await interaction.response.send_message(
-                f"No beers logged in the last {period}! 🚱"
-            )
+            else:
+                await interaction.followup.send("No beers have been logged yet! 🚱")
             return
 
         # Format the leaderboard
@@ -395,7 +675,7 @@ class BeerTrackerCog(commands.Cog):
         )
 
         description = []
-        for idx, (_, count, user_id, total_beers, total_ciders) in enumerate(
+        for idx, (count, user_id, total_beers, total_ciders) in enumerate(
             leaderboard, 1
         ):
             if total_ciders > 0:
@@ -406,7 +686,7 @@ class BeerTrackerCog(commands.Cog):
                 description.append(f"**{idx}.** <@{user_id}> - **{count}** beers 🍻")
 
         embed.description = "\n".join(description)
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
 
     @app_commands.command(
         name="beer_last", description="Check when a user last had a beer"
@@ -424,24 +704,18 @@ class BeerTrackerCog(commands.Cog):
         target_user = user or interaction.user
         db = self.bot.db
 
-        # fetch user data
-        user_data = await db.beer_tracker.find_one({"user_id": target_user.id})
+        # fetch only the most recent matching beer
+        last_beer = await db.beer_events.find_one(
+            {"user_id": target_user.id, **drink_type_filter(drink_type)},
+            sort=[("timestamp", -1)],
+        )
 
-        if not user_data or not user_data["beers"]:
+        if not last_beer:
             await interaction.response.send_message(
                 f"{target_user.name} hasn't drunk any beers yet! 🚱"
             )
             return
 
-        if drink_type == "all":
-            last_beer = user_data["beers"][-1]
-        elif drink_type == "beer":
-            last_beer = [
-                b for b in user_data["beers"] if b.get("type", "beer") == "beer"
-            ][-1]
-        elif drink_type == "cider":
-            last_beer = [b for b in user_data["beers"] if b.get("type") == "cider"][-1]
-
         last_time = ts_to_prague_time(last_beer["timestamp"])
         now = datetime.now(prague_tz)
         time_diff = now - last_time
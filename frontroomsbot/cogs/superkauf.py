@@ -1,7 +1,7 @@
 from discord.ext import commands
 import websockets
 from discord import Embed, Colour
-import json
+import orjson
 from ._config import ConfigCog, Cfg
 import asyncio
 
@@ -15,50 +15,69 @@ class WebSocketClient:
         self.websocket_url = websocket_url
 
     async def connect(self, channel_id):
+        channel = self.bot.get_channel(channel_id)
+        # posting to discord can be slow, so don't let it hold up receiving
+        queue = asyncio.Queue(maxsize=100)
+        sender = asyncio.create_task(self.send_posts(channel, queue))
+
         reconnect_timeout = 1
+        try:
+            while True:
+                try:
+                    async with websockets.connect(
+                        self.websocket_url, ping_interval=20
+                    ) as ws:
+                        reconnect_timeout = 1
+                        while True:
+                            await queue.put(await ws.recv())
+
+                except (websockets.WebSocketException, OSError) as e:
+                    print(
+                        f"Connection lost ({e!r}). Reconnecting in {reconnect_timeout} seconds."
+                    )
+                    await asyncio.sleep(reconnect_timeout)
+                    reconnect_timeout = min(reconnect_timeout * 2, 60)
+        finally:
+            sender.cancel()
+
+    async def send_posts(self, channel, queue: asyncio.Queue):
         while True:
+            message = await queue.get()
             try:
-                async with websockets.connect(self.websocket_url) as ws:
-                    while True:
-                        reconnect_timeout = 1
-                        parsedMessage = json.loads(await ws.recv())
-                        user_data = parsedMessage["user"]
-                        post_data = parsedMessage["post"]
-                        store_data = parsedMessage["store"]
-
-                        channel = self.bot.get_channel(channel_id)
-
-                        embed = Embed(
-                            description=post_data["description"],
-                            colour=Colour.from_rgb(113, 93, 242),
-                        )
-                        embed.add_field(
-                            name="Price",
-                            value=str(post_data["price"]) + "Kč",
-                            inline=True,
-                        )
-                        embed.add_field(
-                            name="Store", value=str(store_data["name"]), inline=True
-                        )
-                        embed.set_author(
-                            name="SuperKauf",
-                            icon_url="https://storage.googleapis.com/superkauf/logos/logo1.png",
-                            url="https://superkauf.krejzac.cz",
-                        )
-                        embed.set_image(url=post_data["image"])
-                        embed.set_footer(
-                            text=user_data["username"],
-                            icon_url=user_data["profile_picture"],
-                        )
-
-                        await channel.send(embed=embed)
-
-            except websockets.ConnectionClosed:
-                reconnect_timeout *= 2
-                print(
-                    f"Connection closed. Reconnecting in {reconnect_timeout} seconds."
+                parsedMessage = orjson.loads(message)
+                user_data = parsedMessage["user"]
+                post_data = parsedMessage["post"]
+                store_data = parsedMessage["store"]
+
+                embed = Embed(
+                    description=post_data["description"],
+                    colour=Colour.from_rgb(113, 93, 242),
+                )
+                embed.add_field(
+                    name="Price",
+                    value=str(post_data["price"]) + "Kč",
+                    inline=True,
                 )
-                await asyncio.sleep(reconnect_timeout)
+                embed.add_field(
+                    name="Store", value=str(store_data["name"]), inline=True
+                )
+                embed.set_author(
+                    name="SuperKauf",
+                    icon_url="https://storage.googleapis.com/superkauf/logos/logo1.png",
+                    url="https://superkauf.krejzac.cz",
+                )
+                embed.set_image(url=post_data["image"])
+                embed.set_footer(
+                    text=user_data["username"],
+                    icon_url=user_data["profile_picture"],
+                )
+
+                await channel.send(embed=embed)
+            except Exception as e:
+                # one bad post shouldn't stop the feed
+                print(f"Failed to post superkauf update: {e!r}")
+            finally:
+                queue.task_done()
 
 
 class SuperkaufCog(ConfigCog):